@@ -5,9 +5,9 @@ dicom_tool.py — Final polished DICOM metadata extractor & batch processor
 Features & improvements included in this final version:
  - Pathlib everywhere, robust CLI with help groups
  - Logging (quiet/verbose), optional log file
- - Threaded batch processing with tqdm progress support
+ - Process- or thread-pool batch processing with tqdm progress support
  - Streaming aggregation for CSV (memory-safe) and JSON
- - Secure pseudonymization: PBKDF2HMAC via cryptography when available, HMAC-SHA256 fallback
+ - Fast pseudonymization: keyed HMAC-SHA256 per value, PBKDF2 (cryptography/hashlib) behind --slow-kdf
  - Pseudonym mapping export with generated salt when needed (ensures reproducibility)
  - Anonymization modes: pseudonymize (default) and remove
  - Remove private tags option
@@ -38,19 +38,39 @@ import csv
 import getpass
 import hashlib
 import hmac
+import importlib.util
+import io
 import json
 import logging
 import os
+import re
+import shutil
 import sys
+import textwrap
+import threading
 import traceback
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime
+from enum import IntFlag
+from functools import singledispatch
+from html import escape
+from operator import itemgetter
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import pydicom
 from pydicom.errors import InvalidDicomError
 
+try:
+    from pydicom.dataset import Dataset as _PydicomDataset
+except Exception:
+    _PydicomDataset = None
+
+try:
+    from pydicom.multival import MultiValue as _PydicomMultiValue
+except Exception:
+    _PydicomMultiValue = None
+
 # Optional heavy deps
 try:
     import numpy as np
@@ -59,6 +79,30 @@ try:
 except Exception:
     _PIL_AVAILABLE = False
 
+# report font loaded once per process (load_default re-parses the bitmap font every call)
+_DEFAULT_FONT = None
+_LINE_H = 14
+# extra gap multiline_text adds on top of the font's own "A" height to land on _LINE_H
+_LINE_SPACING = 4
+if _PIL_AVAILABLE:
+    try:
+        _DEFAULT_FONT = ImageFont.load_default()
+        _glyph_h = _DEFAULT_FONT.getbbox("A")[3]
+        _LINE_H = max(_LINE_H, _glyph_h)
+        _LINE_SPACING = _LINE_H - _glyph_h
+    except Exception:
+        pass
+
+# default thumbnail extension: JPEG when Pillow's codec is libjpeg-turbo (SIMD DCT beats zlib PNG), else PNG
+_THUMB_EXT = '.png'
+if _PIL_AVAILABLE:
+    try:
+        from PIL import features as _pil_features
+        if _pil_features.check_feature('libjpeg_turbo'):
+            _THUMB_EXT = '.jpg'
+    except Exception:
+        pass
+
 try:
     from tqdm import tqdm
     _TQDM = True
@@ -72,10 +116,18 @@ except Exception:
     _RELATIVEDELTA_AVAILABLE = False
 
 try:
-    import pandas as pd
-    _PANDAS_AVAILABLE = True
+    import orjson
+    _ORJSON_AVAILABLE = True
+except Exception:
+    _ORJSON_AVAILABLE = False
+
+try:
+    import xxhash
+    _XXHASH_AVAILABLE = True
+    _XXH3 = getattr(xxhash, 'xxh3_64_hexdigest', None)
 except Exception:
-    _PANDAS_AVAILABLE = False
+    _XXHASH_AVAILABLE = False
+    _XXH3 = None
 
 # cryptography for PBKDF2
 try:
@@ -92,14 +144,18 @@ try:
     colorama_init(autoreset=True)
 except Exception:
     class _Dummy:
-        def __getattr__(self, _):
-            return ''
+        pass
+    # plain class attributes: no __getattr__ call per colour lookup
+    for _a in ('BLACK', 'RED', 'GREEN', 'YELLOW', 'BLUE', 'MAGENTA', 'CYAN', 'WHITE', 'RESET',
+               'RESET_ALL', 'BRIGHT', 'DIM', 'NORMAL'):
+        setattr(_Dummy, _a, '')
     Fore = Style = _Dummy()
 
 # ------------------ Constants & defaults ------------------
 __version__ = "0.9.0"
 DEFAULT_THREADS = 4
 MAX_THREADS = 64
+MAX_WIN_PROCESSES = 61
 CRITICAL_KEYS = {
     "patient_id", "patient_name", "patient_age", "patient_sex",
     "modality", "body_part_examined", "study_description", "study_date_time"
@@ -112,7 +168,41 @@ DEFAULT_ANON_TAGS = [
     'study_comments'
 ]
 
-SUPPORTED_TYPES = {'json', 'csv', 'html', 'image', 'thumbnail', 'fhir', 'report', 'agg-csv', 'agg-json'}
+
+def _tag_variants(tag: str) -> Tuple[str, ...]:
+    return (tag, tag.replace('_', ' ').title(), tag.replace('_', ' '))
+
+
+# key spellings tried per anonymization tag; extended lazily for --anonymize-tags entries
+_TAG_VARIANTS: Dict[str, Tuple[str, ...]] = {t: _tag_variants(t) for t in DEFAULT_ANON_TAGS}
+
+
+class Out(IntFlag):
+    JSON = 1
+    CSV = 2
+    HTML = 4
+    IMAGE = 8
+    THUMBNAIL = 16
+    FHIR = 32
+    REPORT = 64
+    AGG_CSV = 128
+    AGG_JSON = 256
+
+
+OUT_FLAGS: Dict[str, Out] = {
+    'json': Out.JSON, 'csv': Out.CSV, 'html': Out.HTML, 'image': Out.IMAGE, 'thumbnail': Out.THUMBNAIL,
+    'fhir': Out.FHIR, 'report': Out.REPORT, 'agg-csv': Out.AGG_CSV, 'agg-json': Out.AGG_JSON,
+}
+
+# output types that decode PixelData (report reuses the thumbnail file)
+PIXEL_OUTPUTS = Out.IMAGE | Out.THUMBNAIL
+
+# plain-int copies for the per-file tests: IntFlag's operators run as Python code, int & int does not
+_B_JSON, _B_CSV, _B_HTML, _B_IMAGE, _B_THUMBNAIL, _B_FHIR, _B_REPORT = (
+    int(f) for f in (Out.JSON, Out.CSV, Out.HTML, Out.IMAGE, Out.THUMBNAIL, Out.FHIR, Out.REPORT))
+_B_PIXEL = int(PIXEL_OUTPUTS)
+
+SUPPORTED_TYPES = set(OUT_FLAGS)
 EXT_TO_TYPE = {
     'json': 'json', 'csv': 'csv', 'html': 'html',
     'png': 'image', 'jpg': 'image', 'jpeg': 'image',
@@ -147,12 +237,20 @@ def build_parser() -> argparse.ArgumentParser:
     g_anon.add_argument("--anonymize-map", type=str, default=None,
                         help="Path to save pseudonymization map (JSON) when pseudonymize mode used")
     g_anon.add_argument("--anonymize-salt", type=str, default=None, help="Optional salt for pseudonym hashing (recommended for reproducibility)")
+    g_anon.add_argument("--slow-kdf", action="store_true",
+                        help="Derive pseudonyms with PBKDF2 (100k iterations) instead of a single HMAC-SHA256. Much slower")
     g_anon.add_argument("--remove-private-tags", action="store_true", help="Remove private tags from outputs (safe default when anonymizing)")
 
     # Performance & batch group
     g_perf = p.add_argument_group('Batch & performance')
     g_perf.add_argument("-b", "--batch", action="store_true", help="Treat path as directory and scan recursively for .dcm files")
-    g_perf.add_argument("-t", "--threads", type=int, default=DEFAULT_THREADS, help="Threads for batch processing")
+    g_perf.add_argument("-t", "--threads", type=int, default=DEFAULT_THREADS, help="Batch workers (processes or threads, see --executor)")
+    g_perf.add_argument("--executor", choices=['thread', 'process'], default=None,
+                        help="Batch worker pool. Default: process when --threads > 1 (parsing is CPU-bound), else thread")
+    g_perf.add_argument("--no-parallel-frames", action="store_true",
+                        help="Encode multi-frame pixel images one at a time (debugging)")
+    g_perf.add_argument("--jit", action="store_true",
+                        help="JIT-compile pixel normalization with Numba when installed (optional dependency)")
     g_perf.add_argument("--max-depth", type=int, default=None, help="Max recursion depth when scanning folders (None = unlimited)")
     g_perf.add_argument("--min-progress-report", type=int, default=50,
                         help="If processing more than this many files, suppress per-file metadata prints and show progress only")
@@ -199,52 +297,121 @@ def check_dependencies() -> Dict[str, bool]:
     deps = {
         'pillow': _PIL_AVAILABLE,
         'numpy': _PIL_AVAILABLE and 'numpy' in sys.modules,
-        'pandas': _PANDAS_AVAILABLE,
         'tqdm': _TQDM,
         'dateutil.relativedelta': _RELATIVEDELTA_AVAILABLE,
-        'cryptography': _CRYPTO_AVAILABLE
+        'cryptography': _CRYPTO_AVAILABLE,
+        'xxhash': _XXHASH_AVAILABLE,
+        'orjson': _ORJSON_AVAILABLE,
+        'numba': importlib.util.find_spec('numba') is not None
     }
     return deps
 
 # ------------------ Utilities ------------------
 
 def md5_short(s: str, n: int = 8) -> str:
-    return hashlib.md5(s.encode('utf-8')).hexdigest()[:n]
+    # short non-cryptographic fingerprint (filename suffixes); name kept for compatibility
+    if _XXHASH_AVAILABLE and n <= 16:
+        # xxh3 is the SIMD-accelerated variant (xxhash >= 2.0); xxh64 for older installs
+        if _XXH3 is not None:
+            return _XXH3(s.encode('utf-8'))[:n]
+        return xxhash.xxh64(s.encode('utf-8')).hexdigest()[:n]
+    return hashlib.blake2b(s.encode('utf-8'), digest_size=max(1, (n + 1) // 2)).hexdigest()[:n]
 
 
+@singledispatch
 def sanitize_for_json(obj: Any) -> Any:
-    if obj is None or isinstance(obj, (str, int, float, bool)):
-        return obj
-    if isinstance(obj, (bytes, bytearray)):
-        try:
-            return obj.decode('utf-8', errors='ignore')
-        except Exception:
-            return str(obj)
-    if isinstance(obj, (list, tuple)):
-        return [sanitize_for_json(x) for x in obj]
     try:
-        from pydicom.dataset import Dataset
-        if isinstance(obj, Dataset):
-            out = {}
-            for k in obj.keys():
-                try:
-                    v = obj.get(k)
-                except Exception:
-                    v = None
-                out[str(k)] = sanitize_for_json(v)
-            return out
+        return str(obj)
     except Exception:
-        pass
+        return repr(obj)
+
+
+@sanitize_for_json.register(type(None))
+@sanitize_for_json.register(str)
+@sanitize_for_json.register(int)
+@sanitize_for_json.register(float)
+@sanitize_for_json.register(bool)
+def _sanitize_primitive(obj: Any) -> Any:
+    return obj
+
+
+@sanitize_for_json.register(bytes)
+@sanitize_for_json.register(bytearray)
+def _sanitize_bytes(obj: Any) -> Any:
     try:
-        from pydicom.multival import MultiValue
-        if isinstance(obj, MultiValue):
-            return [sanitize_for_json(x) for x in obj]
+        return obj.decode('utf-8', errors='ignore')
     except Exception:
-        pass
-    try:
         return str(obj)
-    except Exception:
-        return repr(obj)
+
+
+@sanitize_for_json.register(list)
+@sanitize_for_json.register(tuple)
+def _sanitize_sequence(obj: Any) -> Any:
+    return [sanitize_for_json(x) for x in obj]
+
+
+if _PydicomMultiValue is not None:
+    sanitize_for_json.register(_PydicomMultiValue, _sanitize_sequence)
+
+if _PydicomDataset is not None:
+    @sanitize_for_json.register(_PydicomDataset)
+    def _sanitize_dataset(obj: Any) -> Any:
+        out = {}
+        for k in obj.keys():
+            try:
+                v = obj.get(k)
+            except Exception:
+                v = None
+            out[str(k)] = sanitize_for_json(v)
+        return out
+
+def _json_default(obj: Any) -> Any:
+    # orjson rejects float subclasses (pydicom DSfloat) and unknown types; the stdlib encoder copes
+    if isinstance(obj, float):
+        return float(obj)
+    if isinstance(obj, int):
+        return int(obj)
+    return str(obj)
+
+
+# stdlib fallback encoders, built once instead of per json.dumps call
+_JSON_ENC = json.JSONEncoder(indent=2, ensure_ascii=False).encode
+_JSON_ENC_COMPACT = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _json_bytes(obj: Any, indent: bool = True) -> bytes:
+    if _ORJSON_AVAILABLE:
+        opt = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            opt |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=opt, default=_json_default)
+    return (_JSON_ENC if indent else _JSON_ENC_COMPACT)(obj).encode('utf-8')
+
+
+def _write_bytes(path, payload: bytes) -> None:
+    # small artifacts: raw fd write, no buffered/text wrapper layers
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def _dump_json(obj: Any, path) -> None:
+    _write_bytes(path, _json_bytes(obj))
+
+
+def _replicate_file(src, dest) -> None:
+    # extra targets of an identical artifact: byte copy (sendfile on Linux), no re-encode.
+    # Not a hardlink: a fixed target rewritten per file in a batch would truncate every linked output.
+    try:
+        if os.path.samefile(src, dest):
+            return
+    except OSError:
+        pass
+    shutil.copyfile(src, dest)
 
 # ------------------ Date helpers ------------------
 
@@ -286,7 +453,7 @@ def human_readable_delta(dt_obj: datetime, now: Optional[datetime] = None) -> st
     return ", ".join(parts[:4])
 
 
-def format_dicom_datetime(date_str: Optional[str], time_str: Optional[str]) -> Tuple[str,bool,Optional[datetime]]:
+def format_dicom_datetime(date_str: Optional[str], time_str: Optional[str], now: Optional[datetime] = None) -> Tuple[str,bool,Optional[datetime]]:
     if not date_str:
         return "N/A", False, None
     try:
@@ -295,7 +462,8 @@ def format_dicom_datetime(date_str: Optional[str], time_str: Optional[str]) -> T
         return "Invalid Date", False, None
     tp = parse_dicom_time_str(time_str)
     dt_obj = datetime.combine(date_obj.date(), tp) if tp else date_obj
-    now = datetime.now()
+    if now is None:
+        now = datetime.now()
     delta_seconds = int((now - dt_obj).total_seconds())
     future = delta_seconds < 0
     rel = human_readable_delta(dt_obj, now)
@@ -321,25 +489,28 @@ def check_phi(ds: pydicom.dataset.Dataset) -> List[str]:
 
 def list_private_tags(ds: pydicom.dataset.Dataset, show_values: bool=False) -> List[Dict[str, Any]]:
     out = []
-    tags = sorted([t for t in ds.keys() if t.is_private], key=lambda x: (x.group, x.elem))
-    for tag in tags:
+    tags = []
+    for t in ds.keys():
+        if t.is_private:
+            try:
+                tags.append((t, ds[t]))
+            except Exception:
+                continue
+    tags.sort(key=lambda x: (x[0].group, x[0].elem))
+    for tag, elem in tags:
         try:
-            elem = ds[tag]
             tag_str = f"({tag.group:04x},{tag.elem:04x})"
             keyword = getattr(elem, 'keyword', '') or ''
             name = getattr(elem, 'name', '') or ''
             creator_tag = pydicom.tag.Tag(tag.group, 0x0010)
             creator = ds.get(creator_tag)
             creator_str = str(creator) if creator else ''
-            value_preview = sanitize_for_json(elem.value)
-            if isinstance(value_preview, str) and len(value_preview) > 200:
-                vp = value_preview[:197] + "..."
-            else:
-                vp = value_preview
-            full = sanitize_for_json(elem.value) if show_values else None
+            sv = sanitize_for_json(elem.value)
+            vp = sv[:197] + "..." if isinstance(sv, str) and len(sv) > 200 else sv
             out.append({
                 'tag': tag_str, 'group': f"0x{tag.group:04x}", 'element': f"0x{tag.elem:04x}",
-                'keyword': keyword, 'name': name, 'creator': creator_str, 'value_preview': vp, 'full_value': full
+                'keyword': keyword, 'name': name, 'creator': creator_str, 'value_preview': vp,
+                'full_value': sv if show_values else None
             })
         except Exception:
             continue
@@ -347,21 +518,26 @@ def list_private_tags(ds: pydicom.dataset.Dataset, show_values: bool=False) -> L
 
 # ------------------ is_urgent ------------------
 
-def is_urgent(ds: pydicom.dataset.Dataset) -> Tuple[bool, List[str]]:
+# one regex pass over the description instead of a substring scan per keyword
+_URGENT_HEAD_RE = re.compile(r'BRAIN|HEAD|STROKE|TRAUMA|INTRACRANIAL|ICH|HEMORRHAGE')
+_ANGIO_RE = re.compile(r'ANGIO|CTA')
+_CT_MR = frozenset(("CT", "MR"))
+
+def is_urgent(ds: pydicom.dataset.Dataset, now: Optional[datetime] = None) -> Tuple[bool, List[str]]:
     reasons = []
     mod = str(ds.get("Modality", "")).upper()
     desc = str(ds.get("StudyDescription", "")).upper()
-    if mod in ("CT", "MR") and any(x in desc for x in ["BRAIN", "HEAD", "STROKE", "TRAUMA", "INTRACRANIAL", "ICH", "HEMORRHAGE"]):
+    if mod in _CT_MR and _URGENT_HEAD_RE.search(desc):
         reasons.append("Head study with stroke/trauma keywords")
-    if "ANGIO" in desc or "CTA" in desc or "CT ANGIO" in desc:
+    if _ANGIO_RE.search(desc):
         reasons.append("Angio/CTA study")
     if mod == "US" and "FAST" in desc:
         reasons.append("FAST ultrasound")
-    age = compute_age_from_ds(ds)
+    age = compute_age_from_ds(ds, now)
     try:
         if isinstance(age, str) and age.endswith('Y'):
             a = int(age.rstrip('Y'))
-            if a >= 65 and mod in ("CT", "MR") and "BRAIN" in desc:
+            if a >= 65 and mod in _CT_MR and "BRAIN" in desc:
                 reasons.append("Elderly patient + brain imaging")
     except Exception:
         pass
@@ -373,79 +549,223 @@ import os
 import base64
 
 
-def _pbkdf2_pseudonym(value: str, salt: bytes, iters: int = 100000, length: int = 12) -> str:
-    # returns a URL-safe base64 pseudonym fragment
-    if not _CRYPTO_AVAILABLE:
-        raise RuntimeError("cryptography not available")
-    value_bytes = str(value).encode('utf-8')
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=length,
-        salt=salt,
-        iterations=iters,
-        backend=default_backend()
-    )
-    key = kdf.derive(value_bytes)
-    return base64.urlsafe_b64encode(key).decode('utf-8').rstrip('=')
+def _pbkdf2_pseudonym(value_bytes: bytes, salt: bytes, iters: int = 100000, length: int = 12) -> str:
+    # returns a URL-safe base64 pseudonym fragment (only used with --slow-kdf)
+    if _CRYPTO_AVAILABLE:
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=length,
+            salt=salt,
+            iterations=iters,
+            backend=default_backend()
+        )
+        key = kdf.derive(value_bytes)
+    else:
+        # hashlib's PBKDF2 keeps the HMAC pad contexts across rounds as well
+        key = hashlib.pbkdf2_hmac('sha256', value_bytes, salt, iters, dklen=length)
+    return base64.urlsafe_b64encode(key).rstrip(b'=').decode('ascii')
+
 
+def _hmac_pseudonym(value_bytes: bytes, salt: bytes) -> str:
+    # single HMAC-SHA256 keyed by the salt; the DICOM value is not a low-entropy password,
+    # so key stretching buys nothing here. 9 digest bytes -> 12 base64 chars, no padding.
+    digest = hmac.new(salt, value_bytes, hashlib.sha256).digest()[:9]
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii')
 
-def pseudonymize_value(value: Any, salt_str: Optional[str]) -> Optional[str]:
+
+def pseudonymize_value(value: Any, salt_str: Optional[str], slow_kdf: bool = False) -> Optional[str]:
     if value is None:
         return None
-    value_str = str(value)
+    if isinstance(value, (bytes, bytearray)):
+        vb = bytes(value)
+    else:
+        vb = str(value).encode('utf-8')
     if salt_str is None:
         # no salt provided: generate random salt for this run (kept by caller in mapping)
         salt_bytes = os.urandom(16)
     else:
         salt_bytes = salt_str.encode('utf-8')
+    key = salt_bytes if salt_bytes else b'default_salt'
 
-    if _CRYPTO_AVAILABLE:
+    if slow_kdf:
         try:
-            pseud = _pbkdf2_pseudonym(value_str, salt_bytes)
-            return f"anon_{pseud}"
+            return f"anon_{_pbkdf2_pseudonym(vb, key)}"
         except Exception as e:
             logging.debug('PBKDF2 pseudonym failed: %s', e)
-    # fallback to HMAC-SHA256
-    key = salt_bytes if salt_bytes else b'default_salt'
-    hm = hmac.new(key, value_str.encode('utf-8'), hashlib.sha256).hexdigest()[:16]
-    return f"anon_{hm}"
+    return f"anon_{_hmac_pseudonym(vb, key)}"
+
+
+# run-wide pseudonym memo: (salt, slow_kdf) -> {value: pseudonym}
+_PSEUDONYM_CACHE: Dict[Tuple[Optional[str], bool], Dict[str, str]] = {}
+
+
+def build_pseudonym_cache(values: Iterable[Any], salt: Optional[str], slow_kdf: bool = False) -> Dict[str, str]:
+    """Pseudonymize each distinct value once per salt; repeated values (e.g. PatientID across a series) are dict hits."""
+    cache = _PSEUDONYM_CACHE.setdefault((salt, slow_kdf), {})
+    for v in values:
+        if v is None:
+            continue
+        key = str(v)
+        if key not in cache:
+            cache[key] = pseudonymize_value(v, salt, slow_kdf)
+    return cache
 
 
-def apply_anonymization_to_sanitized(sanitized: Dict[str, Any], tags: List[str], mode: str, salt: Optional[str]) -> Tuple[Dict[str, Any], Dict[str, str], Optional[str]]:
+def apply_anonymization_to_sanitized(sanitized: Dict[str, Any], tags: List[str], mode: str, salt: Optional[str], slow_kdf: bool = False) -> Tuple[Dict[str, Any], Dict[str, str], Optional[str]]:
     mapping: Dict[str, str] = {}
-    used_salt = salt
-    # If pseudonymize and no salt provided, generate run-level salt and return it for persistence
+    # pseudonymize needs the run-level salt resolved by the caller (see main); remove ignores it
     if mode == 'pseudonymize' and salt is None:
-        used_salt = base64.urlsafe_b64encode(os.urandom(12)).decode('utf-8')
-        logging.warning('No anonymize-salt provided: generating a random salt for this run (saving it to map will allow reproducibility)')
+        raise ValueError('pseudonymize mode requires a salt')
+    used_salt = salt
+    # ordered and de-duplicated: two requested tags can resolve to the same key
+    hits: Dict[str, None] = {}
+    norm: Optional[Dict[str, str]] = None
     for tag in tags:
         # allow both snake_case and human readable keys
-        possible_keys = [tag, tag.replace('_', ' ').title(), tag.replace('_', ' ').replace(' ', ' ')]
+        variants = _TAG_VARIANTS.get(tag)
+        if variants is None:
+            variants = _TAG_VARIANTS.setdefault(tag, _tag_variants(tag))
         found = None
-        for k in possible_keys:
+        for k in variants:
             if k in sanitized:
                 found = k
                 break
         if not found:
-            # try case-insensitive match
-            for k in list(sanitized.keys()):
-                if k.lower().replace(' ', '_') == tag.lower().replace(' ', '_'):
-                    found = k
-                    break
+            # try case-insensitive match; normalized key index built once per call
+            if norm is None:
+                norm = {}
+                for k in sanitized:
+                    norm.setdefault(str(k).lower().replace(' ', '_'), k)
+            found = norm.get(tag.lower().replace(' ', '_'))
         if not found:
             continue
-        orig = sanitized.get(found)
-        if mode == 'pseudonymize':
-            pseud = pseudonymize_value(orig, used_salt)
+        hits[found] = None
+    if mode == 'pseudonymize':
+        # snapshot originals before any field is overwritten
+        originals = {k: sanitized.get(k) for k in hits}
+        cache = build_pseudonym_cache(originals.values(), used_salt, slow_kdf)
+        for k, orig in originals.items():
+            pseud = cache.get(str(orig)) if orig is not None else None
             mapping[str(orig)] = pseud
-            sanitized[found] = pseud
-        else:
-            sanitized[found] = 'REDACTED'
+            sanitized[k] = pseud
+    else:
+        for k in hits:
+            sanitized[k] = 'REDACTED'
     return sanitized, mapping, used_salt
 
 # ------------------ Pixel / thumbnail ------------------
 
-def save_pixel_images(ds: pydicom.dataset.Dataset, out_prefix: str, ext: str = '.png') -> List[str]:
+def _normalize_to_u8(frame: np.ndarray) -> np.ndarray:
+    # min/max scale to 0..255 in a single float32 buffer (no float64 temporaries)
+    fmin = float(frame.min())
+    rng = float(frame.max()) - fmin
+    if rng == 0:
+        return np.zeros(frame.shape, np.uint8)
+    out = np.empty(frame.shape, np.float32)
+    np.subtract(frame, fmin, out=out, dtype=np.float32)
+    out *= (255.0 / rng)
+    # round rather than truncate so the max pixel lands on 255 despite float error
+    out += 0.5
+    return out.astype(np.uint8, copy=False)
+
+
+_JIT_ENABLED = False
+
+
+def _enable_jit() -> bool:
+    """Swap _normalize_to_u8 for a Numba kernel (--jit). Numba is imported only here."""
+    global _normalize_to_u8, _JIT_ENABLED
+    if _JIT_ENABLED:
+        return True
+    if not _PIL_AVAILABLE:
+        return False
+    try:
+        from numba import njit
+    except Exception:
+        logging.warning('--jit requested but numba is not installed; using the NumPy path')
+        return False
+
+    # no fastmath: --jit output must match the NumPy path bit for bit
+    @njit
+    def _minmax(flat):
+        lo = flat[0]
+        hi = flat[0]
+        for i in range(1, flat.size):
+            v = flat[i]
+            if v < lo:
+                lo = v
+            elif v > hi:
+                hi = v
+        return lo, hi
+
+    # serial on purpose: callers already fan out across frames and files, and numba's
+    # fallback workqueue threading layer aborts when parallel kernels are entered concurrently
+    # same float32 steps as _normalize_to_u8: subtract, scale, +0.5, truncate
+    @njit
+    def _scale(flat, fmin, scale, out):
+        half = np.float32(0.5)
+        for i in range(flat.size):
+            out[i] = np.uint8((np.float32(flat[i]) - fmin) * scale + half)
+
+    def _normalize_to_u8_jit(frame: np.ndarray) -> np.ndarray:
+        # one fused min/max pass, then one scale pass straight into uint8
+        flat = np.ascontiguousarray(frame).reshape(-1)
+        if flat.size == 0:
+            return np.zeros(frame.shape, np.uint8)
+        lo, hi = _minmax(flat)
+        fmin = float(lo)
+        rng = float(hi) - fmin
+        if rng == 0:
+            return np.zeros(frame.shape, np.uint8)
+        out = np.empty(flat.size, np.uint8)
+        _scale(flat, np.float32(fmin), np.float32(255.0 / rng), out)
+        return out.reshape(frame.shape)
+
+    _normalize_to_u8 = _normalize_to_u8_jit
+    _JIT_ENABLED = True
+    logging.debug('Numba JIT enabled for pixel normalization')
+    return True
+
+
+def _encode_frame(f: np.ndarray, outpath: str, pil_format: str) -> Optional[str]:
+    # normalize + encode + write one frame; returns the path on success
+    if hasattr(f, 'dtype') and f.dtype != np.uint8:
+        try:
+            f = _normalize_to_u8(f)
+        except Exception:
+            try:
+                f = f.astype(np.uint8)
+            except Exception:
+                return None
+    try:
+        img = Image.fromarray(f)
+    except Exception:
+        try:
+            img = Image.fromarray(np.squeeze(f))
+        except Exception:
+            return None
+
+    if img.mode not in ('L', 'RGB', 'RGBA'):
+        try:
+            img = img.convert('L')
+        except Exception:
+            img = img.convert('RGB')
+
+    try:
+        # encode in memory, then hand the file a single write
+        buf = io.BytesIO()
+        img.save(buf, format=pil_format)
+        Path(outpath).write_bytes(buf.getvalue())
+        return outpath
+    except Exception:
+        try:
+            img.save(outpath)
+            return outpath
+        except Exception:
+            return None
+
+
+def save_pixel_images(ds: pydicom.dataset.Dataset, out_prefix: str, ext: str = '.png', parallel: bool = True) -> List[str]:
     saved: List[str] = []
     if 'PixelData' not in ds:
         return saved
@@ -462,80 +782,56 @@ def save_pixel_images(ds: pydicom.dataset.Dataset, out_prefix: str, ext: str = '
     except Exception:
         return saved
 
-    if np_arr.ndim == 2:
-        frames = [np_arr]
-    elif np_arr.ndim == 3:
+    # split along the first axis for multi-frame data; frames are indexed lazily (views, no list)
+    if np_arr.ndim == 3:
         # heuristics
-        if np_arr.shape[0] <= 512 and (np_arr.shape[1] > 4 and np_arr.shape[2] > 4):
-            frames = [np_arr[i] for i in range(np_arr.shape[0])]
-        else:
-            frames = [np_arr]
-    elif np_arr.ndim == 4:
-        frames = [np_arr[i] for i in range(np_arr.shape[0])]
+        multi = np_arr.shape[0] <= 512 and (np_arr.shape[1] > 4 and np_arr.shape[2] > 4)
     else:
-        frames = [np_arr]
+        multi = np_arr.ndim == 4
+    frame_count = np_arr.shape[0] if multi else 1
 
     ext_l = ext.lower()
     format_map = {'.png': 'PNG', '.jpg': 'JPEG', '.jpeg': 'JPEG', '.bmp': 'BMP', '.tiff': 'TIFF', '.tif': 'TIFF'}
     pil_format = format_map.get(ext_l, 'PNG')
+    try:
+        Path(out_prefix).parent.mkdir(parents=True, exist_ok=True)
+    except Exception:
+        pass
 
-    for idx, frame in enumerate(frames):
-        f = frame
-        if hasattr(f, 'dtype') and f.dtype != np.uint8:
-            try:
-                fmin, fmax = float(f.min()), float(f.max())
-                if fmax - fmin > 0:
-                    f = ((f - fmin) / (fmax - fmin) * 255.0).astype(np.uint8)
-                else:
-                    f = (f * 0).astype(np.uint8)
-            except Exception:
-                try:
-                    f = f.astype(np.uint8)
-                except Exception:
-                    continue
-        try:
-            img = Image.fromarray(f)
-        except Exception:
-            try:
-                img = Image.fromarray(np.squeeze(f))
-            except Exception:
-                continue
+    if frame_count == 1:
+        res = _encode_frame(np_arr[0] if multi else np_arr, f"{out_prefix}{ext_l}", pil_format)
+        return [res] if res else saved
 
-        if img.mode not in ('L', 'RGB', 'RGBA'):
-            try:
-                img = img.convert('L')
-            except Exception:
-                img = img.convert('RGB')
+    def _job(idx: int) -> Optional[str]:
+        return _encode_frame(np_arr[idx], f"{out_prefix}_frame{idx}{ext_l}", pil_format)
 
-        if len(frames) == 1:
-            outpath = f"{out_prefix}{ext_l}"
-        else:
-            outpath = f"{out_prefix}_frame{idx}{ext_l}"
-        try:
-            Path(outpath).parent.mkdir(parents=True, exist_ok=True)
-        except Exception:
-            pass
-        try:
-            img.save(outpath, format=pil_format)
-            saved.append(outpath)
-        except Exception:
-            try:
-                img.save(outpath)
-                saved.append(outpath)
-            except Exception:
-                continue
+    if parallel:
+        # zlib/JPEG encoders release the GIL inside Pillow, so threads overlap the encodes
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1, frame_count)) as ex:
+            results = list(ex.map(_job, range(frame_count)))
+    else:
+        results = [_job(idx) for idx in range(frame_count)]
+    saved.extend(r for r in results if r)
     return saved
 
 
-def try_thumbnail(ds: pydicom.dataset.Dataset, out_path: str, max_size: int = 256) -> bool:
+def _save_thumbnail(img: Image.Image, out_path: str):
+    if str(out_path).lower().endswith(('.jpg', '.jpeg')):
+        img.save(out_path, format='JPEG', quality=85, optimize=False)
+    else:
+        img.save(out_path, format='PNG')
+
+
+def try_thumbnail(ds: pydicom.dataset.Dataset, out_path: str, max_size: int = 256) -> Optional[Image.Image]:
+    """Save a thumbnail (format from the extension) and return the in-memory image (None on failure) for reuse by the reports."""
     if not _PIL_AVAILABLE:
-        return False
+        return None
     try:
         if 'PixelData' not in ds:
-            return False
+            return None
         arr = ds.pixel_array
         if arr is None:
-            return False
+            return None
         np_arr = np.asarray(arr)
         if np_arr.ndim == 3:
             idx = np_arr.shape[0] // 2
@@ -545,66 +841,67 @@ def try_thumbnail(ds: pydicom.dataset.Dataset, out_path: str, max_size: int = 25
         else:
             frame = np_arr
         if frame.dtype != np.uint8:
-            fmin, fmax = float(frame.min()), float(frame.max())
-            if fmax - fmin > 0:
-                frame = ((frame - fmin) / (fmax - fmin) * 255.0).astype(np.uint8)
-            else:
-                frame = (frame * 0).astype(np.uint8)
+            frame = _normalize_to_u8(frame)
         img = Image.fromarray(frame)
         img = img.convert('L') if img.mode != 'L' else img
         img.thumbnail((max_size, max_size))
         Path(out_path).parent.mkdir(parents=True, exist_ok=True)
-        img.save(out_path, format='PNG')
-        return True
+        _save_thumbnail(img, out_path)
+        return img
     except Exception as e:
         logging.debug('Thumbnail creation failed: %s', e)
-        return False
+        return None
 
 # ------------------ Metadata extraction ------------------
 
-def get_dicom_metadata_from_ds(ds: pydicom.dataset.Dataset, file_path: str) -> Dict[str, Any]:
+def get_dicom_metadata_from_ds(ds: pydicom.dataset.Dataset, file_path: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+    if now is None:
+        now = datetime.now()
     try:
-        study_dt_str, warn_future, dt_obj = format_dicom_datetime(ds.get('StudyDate', 'N/A'), ds.get('StudyTime', 'N/A'))
+        study_dt_str, warn_future, dt_obj = format_dicom_datetime(ds.get('StudyDate', 'N/A'), ds.get('StudyTime', 'N/A'), now)
         stat_report = {
             'patient_id': str(ds.get('PatientID', 'N/A')),
             'patient_name': str(ds.get('PatientName', 'N/A')),
-            'patient_age': compute_age_from_ds(ds),
+            'patient_age': compute_age_from_ds(ds, now),
             'patient_sex': str(ds.get('PatientSex', 'N/A')),
             'modality': str(ds.get('Modality', 'N/A')),
             'body_part_examined': str(ds.get('BodyPartExamined', 'N/A')),
             'study_description': str(ds.get('StudyDescription', 'N/A')),
             'study_date_time': study_dt_str,
-            'phi_removed': ds.get('PatientIdentityRemoved', 'Unknown'),
+            'phi_removed': sanitize_for_json(ds.get('PatientIdentityRemoved', 'Unknown')),
             '_study_date_future': warn_future,
             '_file_path': file_path,
         }
         full_report = {
             'manufacturer': str(ds.get('Manufacturer', 'N/A')),
             'model': str(ds.get('ManufacturerModelName', 'N/A')),
-            'software_versions': ds.get('SoftwareVersions', 'N/A'),
-            'magnetic_field_strength': ds.get('MagneticFieldStrength', 'N/A'),
-            'slice_thickness': ds.get('SliceThickness', 'N/A'),
-            'pixel_spacing': ds.get('PixelSpacing', 'N/A'),
-            'rows': ds.get('Rows', 'N/A'),
-            'columns': ds.get('Columns', 'N/A'),
-            'photometric_interpretation': ds.get('PhotometricInterpretation', 'N/A'),
-            'study_instance_uid': ds.get('StudyInstanceUID', 'N/A'),
-            'series_instance_uid': ds.get('SeriesInstanceUID', 'N/A'),
+            'software_versions': sanitize_for_json(ds.get('SoftwareVersions', 'N/A')),
+            'magnetic_field_strength': sanitize_for_json(ds.get('MagneticFieldStrength', 'N/A')),
+            'slice_thickness': sanitize_for_json(ds.get('SliceThickness', 'N/A')),
+            'pixel_spacing': sanitize_for_json(ds.get('PixelSpacing', 'N/A')),
+            'rows': sanitize_for_json(ds.get('Rows', 'N/A')),
+            'columns': sanitize_for_json(ds.get('Columns', 'N/A')),
+            'photometric_interpretation': sanitize_for_json(ds.get('PhotometricInterpretation', 'N/A')),
+            'study_instance_uid': sanitize_for_json(ds.get('StudyInstanceUID', 'N/A')),
+            'series_instance_uid': sanitize_for_json(ds.get('SeriesInstanceUID', 'N/A')),
             'transfer_syntax_uid': str(getattr(ds.file_meta, 'TransferSyntaxUID', 'N/A')),
         }
         phi_flags = check_phi(ds)
-        urgent, reasons = is_urgent(ds)
+        urgent, reasons = is_urgent(ds, now)
         private_tags = list_private_tags(ds, show_values=False)
+        # stat/full values are JSON-ready here (str() or sanitized), so callers can merge them as-is
         # add some extras
         if hasattr(ds, 'NumberOfFrames'):
-            full_report['number_of_frames'] = ds.NumberOfFrames
+            full_report['number_of_frames'] = sanitize_for_json(ds.NumberOfFrames)
         return {'stat': stat_report, 'full': full_report, 'phi_flags': phi_flags, 'urgent': urgent, 'urgent_reasons': reasons, 'private_tags': private_tags}
     except Exception as e:
-        return {'Error': f"Unexpected error extracting metadata: {e}\n{traceback.format_exc()}"}
+        # the caller logs the message; the traceback is only formatted when DEBUG is enabled
+        logging.debug('Metadata error for %s', file_path, exc_info=True)
+        return {'Error': f"Unexpected error extracting metadata: {e}"}
 
 # ------------------ compute age ------------------
 
-def compute_age_from_ds(ds: pydicom.dataset.Dataset) -> str:
+def compute_age_from_ds(ds: pydicom.dataset.Dataset, now: Optional[datetime] = None) -> str:
     age = ds.get('PatientAge')
     if age and str(age).strip():
         return str(age)
@@ -612,7 +909,7 @@ def compute_age_from_ds(ds: pydicom.dataset.Dataset) -> str:
     if bdate:
         try:
             bd = datetime.strptime(str(bdate), '%Y%m%d')
-            years = (datetime.now() - bd).days // 365
+            years = ((now or datetime.now()) - bd).days // 365
             return f"{years}Y"
         except Exception:
             return 'N/A'
@@ -620,9 +917,17 @@ def compute_age_from_ds(ds: pydicom.dataset.Dataset) -> str:
 
 # ------------------ Output helpers ------------------
 
+def _resolve_output_path(fn: str, cwd: str) -> str:
+    # bare filenames land in the cwd; anything with a directory part is kept as given
+    if os.path.isabs(fn) or '/' in fn or os.sep in fn:
+        return fn
+    return os.path.join(cwd, fn)
+
+
 def parse_output_items(items: List[str], outdir: str) -> Dict[str, List[str]]:
     outmap: Dict[str, List[str]] = {}
     outdirp = Path(outdir)
+    cwd = os.getcwd()
     for raw in items:
         if not raw:
             continue
@@ -634,8 +939,7 @@ def parse_output_items(items: List[str], outdir: str) -> Dict[str, List[str]]:
                 if t not in SUPPORTED_TYPES:
                     logging.warning("Unsupported output type '%s' in '%s' -> skipped", t, p)
                     continue
-                path = Path(fn) if Path(fn).is_absolute() or Path(fn).parent != Path('.') else Path.cwd() / fn
-                outmap.setdefault(t, []).append(str(path))
+                outmap.setdefault(t, []).append(_resolve_output_path(fn, cwd))
                 continue
             if p.lower() in SUPPORTED_TYPES:
                 outmap.setdefault(p.lower(), []).append('')
@@ -646,29 +950,42 @@ def parse_output_items(items: List[str], outdir: str) -> Dict[str, List[str]]:
                 if not t:
                     logging.warning("Unknown extension '.%s' for '%s' -- supported: .json .csv .html .png .jpg .jpeg .bmp .tiff", ext, p)
                     continue
-                path = Path(p) if Path(p).is_absolute() or Path(p).parent != Path('.') else Path.cwd() / p
-                outmap.setdefault(t, []).append(str(path))
+                outmap.setdefault(t, []).append(_resolve_output_path(p, cwd))
                 continue
             logging.warning("Unrecognized output argument '%s' -- supported types: %s", p, ','.join(sorted(SUPPORTED_TYPES)))
     return outmap
 
+
+def output_flags(outputs_map: Dict[str, List[str]]) -> int:
+    # collapse the requested kinds into one plain-int bitmask; computed once per run by main
+    flags = 0
+    for kind in outputs_map:
+        flags |= OUT_FLAGS.get(kind, 0)
+    return int(flags)
+
 # ------------------ find files ------------------
 
 def find_dicom_files(root: str, max_depth: Optional[int] = None) -> List[str]:
-    rootp = Path(root)
-    if not rootp.exists():
+    if not os.path.exists(root):
         return []
-    # case-insensitive suffix check
     out: List[str] = []
-    if max_depth is None:
-        for p in rootp.rglob('*'):
-            if p.is_file() and p.suffix.lower() == '.dcm':
-                out.append(str(p))
-    else:
-        base_level = len(rootp.parts)
-        for p in rootp.rglob('*'):
-            if p.is_file() and p.suffix.lower() == '.dcm' and (len(p.parts) - base_level) <= max_depth:
-                out.append(str(p))
+
+    def _walk(d: str, depth: int):
+        # depth counts path components below root (files directly in root are depth 1)
+        try:
+            with os.scandir(d) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if max_depth is None or depth < max_depth:
+                            _walk(entry.path, depth + 1)
+                    elif entry.is_file() and entry.name.lower().endswith('.dcm'):
+                        if max_depth is None or depth <= max_depth:
+                            out.append(entry.path)
+        except OSError as e:
+            logging.debug('Cannot scan %s: %s', d, e)
+
+    # case-insensitive suffix check, DirEntry avoids a Path + stat per entry
+    _walk(str(root), 1)
     return out
 
 # ------------------ Flatten helper ------------------
@@ -678,17 +995,74 @@ def _flatten_for_csv_value(v: Any) -> Any:
         return ''
     if isinstance(v, (dict, list, tuple)):
         try:
-            return json.dumps(v, ensure_ascii=False)
+            return _JSON_ENC_COMPACT(v)
         except Exception:
             return str(v)
     return v
 
+def prepare_output_dir(args, outputs_map: Optional[Dict[str, List[str]]] = None) -> Path:
+    """Resolve and create the output dirs once per run; cached on args for process_and_save."""
+    out_dir = Path(args.output_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    thumb_dir = out_dir / 'thumbnails'
+    # dry runs write nothing under thumbnails/; try_thumbnail creates it on a real write anyway
+    if outputs_map and 'thumbnail' in outputs_map and not args.dry_run:
+        thumb_dir.mkdir(exist_ok=True)
+    args._out_dir = out_dir
+    args._thumb_dir = thumb_dir
+    return out_dir
+
+
+def _csv_quote(v: Any) -> str:
+    # minimal quoting, same rule as csv.QUOTE_MINIMAL
+    s = str(v)
+    if ',' in s or '"' in s or '\n' in s or '\r' in s:
+        return '"' + s.replace('"', '""') + '"'
+    return s
+
 # ------------------ Processing per-file ------------------
 
-def process_and_save(path: str, args, outputs_map: Dict[str, List[str]], dry_run: bool=False, suppress_details: bool = False) -> Optional[Dict[str, Any]]:
+_DOT_PATH = Path('.')
+IO_POOL_WORKERS = 4
+_IO_POOL: Optional[ThreadPoolExecutor] = None
+_IO_POOL_SIZE = IO_POOL_WORKERS
+_IO_POOL_LOCK = threading.Lock()
+
+
+def _size_io_pool(workers: int):
+    # thread batches share this pool across all files; it must be at least as wide as the
+    # batch or emitter work from W concurrent files queues behind IO_POOL_WORKERS threads
+    global _IO_POOL, _IO_POOL_SIZE
+    with _IO_POOL_LOCK:
+        size = max(IO_POOL_WORKERS, workers)
+        if _IO_POOL is not None and size > _IO_POOL_SIZE:
+            # already built narrower (e.g. by an earlier run in this process): rebuild on next use
+            _IO_POOL.shutdown(wait=False)
+            _IO_POOL = None
+        _IO_POOL_SIZE = max(_IO_POOL_SIZE, size)
+
+
+def _get_io_pool() -> ThreadPoolExecutor:
+    # shared across process_and_save calls; created lazily so forked workers build their own
+    global _IO_POOL
+    if _IO_POOL is None:
+        with _IO_POOL_LOCK:
+            if _IO_POOL is None:
+                _IO_POOL = ThreadPoolExecutor(max_workers=_IO_POOL_SIZE, thread_name_prefix='dicom-io')
+    return _IO_POOL
+
+
+def process_and_save(path: str, args, outputs_map: Dict[str, List[str]], dry_run: bool=False, suppress_details: bool = False,
+                     now: Optional[datetime] = None, flags: Optional[int] = None) -> Optional[Dict[str, Any]]:
     pathp = Path(path)
+    # metadata-only runs skip reading PixelData. specific_tags is not used: the PHI check and
+    # private-tag listing need the whole (non-pixel) tag tree.
+    if flags is None:
+        # direct callers; main passes the mask it computed once for the run
+        flags = output_flags(outputs_map) if outputs_map else 0
+    needs_pixels = bool(flags & _B_PIXEL)
     try:
-        ds = pydicom.dcmread(str(pathp), force=args.force)
+        ds = pydicom.dcmread(str(pathp), force=args.force, stop_before_pixels=not needs_pixels)
     except InvalidDicomError:
         logging.error('Not a valid DICOM: %s', path)
         return None
@@ -697,7 +1071,7 @@ def process_and_save(path: str, args, outputs_map: Dict[str, List[str]], dry_run
         logging.debug(traceback.format_exc())
         return None
 
-    metadata = get_dicom_metadata_from_ds(ds, str(pathp))
+    metadata = get_dicom_metadata_from_ds(ds, str(pathp), now)
     if 'Error' in metadata:
         logging.error('Metadata extraction error for %s: %s', path, metadata.get('Error'))
         return None
@@ -705,9 +1079,9 @@ def process_and_save(path: str, args, outputs_map: Dict[str, List[str]], dry_run
     sanitized: Dict[str, Any] = {}
     stat = metadata.get('stat', {})
     full = metadata.get('full', {})
-    # merge into snake_case flat dict
-    sanitized.update({k: sanitize_for_json(v) for k, v in stat.items() if not str(k).startswith('_')})
-    sanitized.update({k: sanitize_for_json(v) for k, v in full.items()})
+    # merge into snake_case flat dict (values were sanitized during extraction)
+    sanitized.update({k: v for k, v in stat.items() if not str(k).startswith('_')})
+    sanitized.update(full)
     sanitized['phi_flags'] = metadata.get('phi_flags', [])
     sanitized['urgent'] = metadata.get('urgent', False)
     sanitized['urgent_reasons'] = metadata.get('urgent_reasons', [])
@@ -718,7 +1092,7 @@ def process_and_save(path: str, args, outputs_map: Dict[str, List[str]], dry_run
     used_salt: Optional[str] = None
     if args.anonymize:
         tags_to_anon = DEFAULT_ANON_TAGS if not args.anonymize_tags else [t.strip() for t in args.anonymize_tags.split(',') if t.strip()]
-        sanitized, amap, used_salt = apply_anonymization_to_sanitized(sanitized, tags_to_anon, args.anonymize_mode, args.anonymize_salt)
+        sanitized, amap, used_salt = apply_anonymization_to_sanitized(sanitized, tags_to_anon, args.anonymize_mode, args.anonymize_salt, args.slow_kdf)
         if amap:
             anon_map_local.update(amap)
 
@@ -730,15 +1104,21 @@ def process_and_save(path: str, args, outputs_map: Dict[str, List[str]], dry_run
             logging.debug('Processed %s (details suppressed)', path)
 
     base = pathp.stem
+    # non-cryptographic: the suffix only keeps outputs of same-named files apart
     uniq = md5_short(str(pathp.resolve()))
-    out_dir = Path(args.output_dir)
-    out_dir.mkdir(parents=True, exist_ok=True)
+    out_dir = getattr(args, '_out_dir', None)
+    if out_dir is None:
+        out_dir = prepare_output_dir(args, outputs_map)
+    thumb_dir = args._thumb_dir
 
     thumb_path: Optional[str] = None
+    thumb_ok = False  # set when a thumbnail file was written this call; spares the report helpers a stat
+    thumb_img = None  # decoded thumbnail kept in memory for the metadata image
 
     # JSON per-file
-    if 'json' in outputs_map:
+    def _emit_json():
         targets = outputs_map.get('json') or ['']
+        first: Optional[Path] = None
         for t in targets:
             outpath = Path(t) if t else out_dir / f"{base}_{uniq}_metadata.json"
             if args.dry_run:
@@ -747,16 +1127,20 @@ def process_and_save(path: str, args, outputs_map: Dict[str, List[str]], dry_run
                 try:
                     if outpath.exists() and args.no_overwrite:
                         logging.warning('Skipping existing file (no-overwrite): %s', outpath)
+                    elif first is not None:
+                        _replicate_file(first, outpath)
+                        logging.info('Saved JSON -> %s', outpath)
                     else:
-                        with open(outpath, 'w', encoding='utf-8') as f:
-                            json.dump(sanitized, f, indent=2, ensure_ascii=False)
+                        _dump_json(sanitized, outpath)
+                        first = outpath
                         logging.info('Saved JSON -> %s', outpath)
                 except Exception as e:
                     logging.error('Failed to save JSON: %s', e)
 
     # CSV per-file
-    if 'csv' in outputs_map:
+    def _emit_csv():
         targets = outputs_map.get('csv') or ['']
+        first: Optional[Path] = None
         for t in targets:
             outpath = Path(t) if t else out_dir / f"{base}_{uniq}_metadata.csv"
             if args.dry_run:
@@ -765,70 +1149,95 @@ def process_and_save(path: str, args, outputs_map: Dict[str, List[str]], dry_run
                 try:
                     if outpath.exists() and args.no_overwrite:
                         logging.warning('Skipping existing file (no-overwrite): %s', outpath)
+                    elif first is not None:
+                        _replicate_file(first, outpath)
+                        logging.info('Saved CSV -> %s', outpath)
                     else:
+                        # header + one row: build the text and write it once, no DictWriter
+                        payload = ''
+                        if sanitized:
+                            keys = list(sanitized.keys())
+                            header = ','.join(_csv_quote(k) for k in keys)
+                            row = ','.join(_csv_quote(_flatten_for_csv_value(sanitized[k])) for k in keys)
+                            payload = header + '\n' + row + '\n'
                         with open(outpath, 'w', newline='', encoding='utf-8') as f:
-                            if sanitized:
-                                writer = csv.DictWriter(f, fieldnames=list(sanitized.keys()))
-                                writer.writeheader()
-                                writer.writerow({k: _flatten_for_csv_value(v) for k, v in sanitized.items()})
+                            f.write(payload)
+                        first = outpath
                         logging.info('Saved CSV -> %s', outpath)
                 except Exception as e:
                     logging.error('Failed to save CSV: %s', e)
 
     # Thumbnail
-    if 'thumbnail' in outputs_map:
+    def _emit_thumbnail():
+        nonlocal thumb_path, thumb_ok, thumb_img
         targets = outputs_map.get('thumbnail') or ['']
         for t in targets:
-            dest = Path(t) if t else out_dir / 'thumbnails' / f"{base}_{uniq}_thumb.png"
+            dest = Path(t) if t else thumb_dir / f"{base}_{uniq}_thumb{_THUMB_EXT}"
             if args.dry_run:
                 logging.info('DRY RUN: would create thumbnail -> %s', dest)
             else:
                 try:
-                    ok = try_thumbnail(ds, str(dest))
-                    if ok:
+                    if thumb_img is not None:
+                        # extra targets reuse the decoded thumbnail instead of decoding pixels again
+                        dest.parent.mkdir(parents=True, exist_ok=True)
+                        _save_thumbnail(thumb_img, str(dest))
+                    else:
+                        thumb_img = try_thumbnail(ds, str(dest))
+                    if thumb_img is not None:
                         logging.info('Thumbnail -> %s', dest)
                         thumb_path = str(dest)
+                        thumb_ok = True
                     else:
                         logging.warning('Thumbnail unavailable or failed (compressed/unsupported) for %s', path)
                 except Exception as e:
                     logging.error('Thumbnail generation failed: %s', e)
 
     # HTML
-    if 'html' in outputs_map:
+    def _emit_html():
         targets = outputs_map.get('html') or ['']
+        first: Optional[Path] = None
         for t in targets:
             dest = Path(t) if t else out_dir / f"{base}_{uniq}_report.html"
             if args.dry_run:
                 logging.info('DRY RUN: would save HTML -> %s', dest)
             else:
                 try:
-                    generate_html_report({'STAT_Report': sanitized, 'Full_Report': {}}, thumb_path, str(dest))
+                    if first is not None:
+                        _replicate_file(first, dest)
+                    else:
+                        generate_html_report({'STAT_Report': sanitized, 'Full_Report': {}}, thumb_path, str(dest),
+                                             thumb_ok=thumb_ok)
+                        first = dest
                     logging.info('HTML report -> %s', dest)
                 except Exception as e:
                     logging.error('Failed to save HTML: %s', e)
 
     # FHIR
-    if 'fhir' in outputs_map:
+    def _emit_fhir():
         targets = outputs_map.get('fhir') or ['']
+        first: Optional[Path] = None
         for t in targets:
             dest = Path(t) if t else out_dir / f"{base}_{uniq}_imagingstudy.json"
             if args.dry_run:
                 logging.info('DRY RUN: would save FHIR -> %s', dest)
             else:
                 try:
-                    imaging = dicom_to_fhir_imagingstudy(sanitized)
-                    with open(dest, 'w', encoding='utf-8') as f:
-                        json.dump(imaging, f, indent=2, ensure_ascii=False)
+                    if first is not None:
+                        _replicate_file(first, dest)
+                    else:
+                        _dump_json(dicom_to_fhir_imagingstudy(sanitized), dest)
+                        first = dest
                     logging.info('FHIR ImagingStudy -> %s', dest)
                 except Exception as e:
                     logging.error('Failed to save FHIR JSON: %s', e)
 
     # IMAGE (pixel extraction)
-    if 'image' in outputs_map:
+    def _emit_image():
         targets = outputs_map.get('image') or ['']
         for t in targets:
-            if t and Path(t).suffix:
-                outpath = Path(t) if Path(t).is_absolute() or Path(t).parent != Path('.') else Path.cwd() / t
+            tp = Path(t) if t else None
+            if tp is not None and tp.suffix:
+                outpath = tp if tp.is_absolute() or tp.parent != _DOT_PATH else Path.cwd() / tp
                 prefix_no_ext = outpath.with_suffix('')
                 ext = outpath.suffix.lower() or '.png'
                 allowed = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.tif')
@@ -843,7 +1252,7 @@ def process_and_save(path: str, args, outputs_map: Dict[str, List[str]], dry_run
                 logging.info('DRY RUN: would save pixel images -> %s*%s', prefix_no_ext, ext)
             else:
                 try:
-                    saved = save_pixel_images(ds, str(prefix_no_ext), ext=ext)
+                    saved = save_pixel_images(ds, str(prefix_no_ext), ext=ext, parallel=not args.no_parallel_frames)
                     if saved:
                         logging.info('Saved pixel image(s): %s', saved)
                     else:
@@ -852,7 +1261,7 @@ def process_and_save(path: str, args, outputs_map: Dict[str, List[str]], dry_run
                     logging.error('Failed to extract/save pixel images: %s', e)
 
     # REPORT (metadata-as-image)
-    if 'report' in outputs_map:
+    def _emit_report():
         targets = outputs_map.get('report') or ['']
         for t in targets:
             dest = Path(t) if t else out_dir / f"{base}_{uniq}_metadata_report.png"
@@ -860,11 +1269,33 @@ def process_and_save(path: str, args, outputs_map: Dict[str, List[str]], dry_run
                 logging.info('DRY RUN: would generate metadata image -> %s', dest)
             else:
                 try:
-                    generate_metadata_image({'STAT_Report': sanitized, 'Private_Tags': sanitized.get('private_tags', [])}, thumb_path, str(dest))
+                    generate_metadata_image({'STAT_Report': sanitized, 'Private_Tags': sanitized.get('private_tags', [])}, thumb_path, str(dest),
+                                            thumb_img=thumb_img, thumb_ok=thumb_ok)
                     logging.info('Metadata image -> %s', dest)
                 except Exception as e:
                     logging.error('Failed to generate metadata image: %s', e)
 
+    # independent artifacts overlap on the shared I/O pool; html/report need thumb_path,
+    # so the thumbnail is produced here first while the others are already running.
+    # The thumbnail also runs before the image step is submitted: both read ds.pixel_array,
+    # and only a sequential first access leaves the decoded array cached for the second.
+    pool = _get_io_pool()
+    pending = [pool.submit(fn) for kind, fn in ((_B_JSON, _emit_json), (_B_CSV, _emit_csv), (_B_FHIR, _emit_fhir))
+               if kind & flags]
+    # single gate for the pixel outputs: never touch pixel_array on datasets read without/lacking PixelData
+    if needs_pixels:
+        if args.dry_run or 'PixelData' in ds:
+            if flags & _B_THUMBNAIL:
+                _emit_thumbnail()
+            if flags & _B_IMAGE:
+                pending.append(pool.submit(_emit_image))
+        else:
+            logging.warning('No PixelData in %s; skipping image/thumbnail outputs', path)
+    pending.extend(pool.submit(fn) for kind, fn in ((_B_HTML, _emit_html), (_B_REPORT, _emit_report))
+                   if kind & flags)
+    for fut in pending:
+        fut.result()
+
     # return sanitized + mapping info for aggregation
     out = dict(sanitized)
     if anon_map_local:
@@ -873,49 +1304,85 @@ def process_and_save(path: str, args, outputs_map: Dict[str, List[str]], dry_run
         out['_anon_salt'] = used_salt
     return out
 
+# ------------------ Batch workers ------------------
+
+# per-worker state, set once by the pool initializer so args aren't pickled per task
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_batch_worker(args, outputs_map: Dict[str, List[str]], suppress_details: bool, now: Optional[datetime] = None,
+                       setup_logging: bool = False, flags: Optional[int] = None):
+    if setup_logging:
+        # child processes (spawn start method) do not inherit the parent's logging config
+        configure_logging(args.quiet, args.verbose, args.log_file)
+        if args.jit:
+            # spawned children start from a fresh module; forked ones already have it
+            _enable_jit()
+    _WORKER_STATE.update(args=args, outputs_map=outputs_map, suppress_details=suppress_details, now=now, flags=flags)
+
+
+def _batch_worker(path: str) -> Optional[Dict[str, Any]]:
+    args = _WORKER_STATE['args']
+    try:
+        return process_and_save(path, args, _WORKER_STATE['outputs_map'], args.dry_run, _WORKER_STATE['suppress_details'],
+                                _WORKER_STATE['now'], _WORKER_STATE['flags'])
+    except Exception as e:
+        logging.error('Error in worker for %s: %s', path, e)
+        return None
+
 # ------------------ Reporting helpers ------------------
 
-def generate_html_report(metadata: Dict[str, Any], thumbnail_path: Optional[str], out_html: str):
+_HTML_STYLE = ('body{font-family:Arial,Helvetica,sans-serif;padding:16px} .stat{background:#ffecec;padding:8px;border-radius:6px} '
+               '.full{background:#eef9ec;padding:8px;border-radius:6px} h1{font-size:18px}')
+
+
+def _html_value(v: Any) -> str:
+    # primitives skip the sanitize dispatch; everything is escaped (DICOM strings are untrusted)
+    if not (v is None or isinstance(v, (str, int, float, bool))):
+        v = sanitize_for_json(v)
+    return escape(str(v))
+
+
+def generate_html_report(metadata: Dict[str, Any], thumbnail_path: Optional[str], out_html: str, thumb_ok: bool = False):
     stat = metadata.get('STAT_Report', {})
     full = metadata.get('Full_Report', {})
-    html_lines = []
-    html_lines.append('<!doctype html>')
-    html_lines.append('<html><head><meta charset="utf-8"><title>DICOM Report</title>')
-    html_lines.append('<style>body{font-family:Arial,Helvetica,sans-serif;padding:16px} .stat{background:#ffecec;padding:8px;border-radius:6px} .full{background:#eef9ec;padding:8px;border-radius:6px} h1{font-size:18px}</style>')
-    html_lines.append('</head><body>')
-    html_lines.append('<h1>DICOM Metadata Report</h1>')
-    if thumbnail_path and Path(thumbnail_path).exists():
-        html_lines.append(f'<img src="{Path(thumbnail_path).name}" alt="thumbnail" style="max-width:200px;float:right;margin-left:12px">')
-    html_lines.append('<h2>STAT (critical)</h2>')
-    html_lines.append('<div class="stat"><ul>')
-    for k, v in stat.items():
-        if k.startswith('_'):
-            continue
-        html_lines.append(f'<li><strong>{k}:</strong> {sanitize_for_json(v)}</li>')
-    html_lines.append('</ul></div>')
-    html_lines.append('<h2>Full (technical)</h2>')
-    html_lines.append('<div class="full"><ul>')
-    for k, v in full.items():
-        html_lines.append(f'<li><strong>{k}:</strong> {sanitize_for_json(v)}</li>')
-    html_lines.append('</ul></div>')
-    html_lines.append('<h2>Private Tags</h2>')
-    html_lines.append('<div class="full"><ul>')
-    for p in metadata.get('Private_Tags', []):
-        html_lines.append(f'<li><strong>{p.get("tag")}:</strong> Creator: {p.get("creator")} | Name: {p.get("name")} | Preview: {p.get("value_preview")}</li>')
-    html_lines.append('</ul></div>')
-    html_lines.append('</body></html>')
-    with open(out_html, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(html_lines))
-
-
-def generate_metadata_image(metadata: Dict[str, Any], thumbnail_path: Optional[str], out_image: str, width: int = 1200):
+    thumb_html = ''
+    if thumb_ok and thumbnail_path:
+        thumb_html = f'<img src="{escape(Path(thumbnail_path).name)}" alt="thumbnail" style="max-width:200px;float:right;margin-left:12px">\n'
+    stat_items = '\n'.join(f'<li><strong>{escape(str(k))}:</strong> {_html_value(v)}</li>'
+                           for k, v in stat.items() if not k.startswith('_'))
+    full_items = '\n'.join(f'<li><strong>{escape(str(k))}:</strong> {_html_value(v)}</li>' for k, v in full.items())
+    private_items = '\n'.join(
+        f'<li><strong>{_html_value(p.get("tag"))}:</strong> Creator: {_html_value(p.get("creator"))} | '
+        f'Name: {_html_value(p.get("name"))} | Preview: {_html_value(p.get("value_preview"))}</li>'
+        for p in metadata.get('Private_Tags', []))
+    page = (
+        '<!doctype html>\n'
+        '<html><head><meta charset="utf-8"><title>DICOM Report</title>\n'
+        f'<style>{_HTML_STYLE}</style>\n'
+        '</head><body>\n'
+        '<h1>DICOM Metadata Report</h1>\n'
+        f'{thumb_html}'
+        '<h2>STAT (critical)</h2>\n'
+        f'<div class="stat"><ul>\n{stat_items}\n</ul></div>\n'
+        '<h2>Full (technical)</h2>\n'
+        f'<div class="full"><ul>\n{full_items}\n</ul></div>\n'
+        '<h2>Private Tags</h2>\n'
+        f'<div class="full"><ul>\n{private_items}\n</ul></div>\n'
+        '</body></html>'
+    )
+    _write_bytes(out_html, page.encode('utf-8'))
+
+
+def generate_metadata_image(metadata: Dict[str, Any], thumbnail_path: Optional[str], out_image: str, width: int = 1200,
+                            thumb_img: Optional[Image.Image] = None, thumb_ok: bool = False):
     if not _PIL_AVAILABLE:
         raise RuntimeError('Pillow not installed')
     stat = metadata.get('STAT_Report', {})
     full = metadata.get('Full_Report', {})
     private = metadata.get('Private_Tags', [])
     margin = 24
-    right_col_width = 320 if thumbnail_path else 0
+    right_col_width = 320 if (thumb_ok or thumb_img is not None) else 0
     lines: List[str] = []
     lines.append('DICOM METADATA REPORT')
     lines.append('')
@@ -939,39 +1406,27 @@ def generate_metadata_image(metadata: Dict[str, Any], thumbnail_path: Optional[s
     lines.append('Full (technical):')
     for k, v in full.items():
         lines.append(f"{k}: {v}")
-    try:
-        font = ImageFont.load_default()
-        title_font = ImageFont.load_default()
-    except Exception:
-        font = None
-        title_font = None
-    line_h = 14
-    if title_font:
-        try:
-            line_h = max(line_h, title_font.getsize("A")[1])
-        except Exception:
-            line_h = 14
-    canvas_h = margin * 2 + line_h * (len(lines) + 2)
+    # wrap first so the canvas height accounts for continuation lines
+    full_text = '\n'.join(textwrap.fill(line, width=120) for line in lines)
+    font = _DEFAULT_FONT
+    line_h = _LINE_H
+    canvas_h = margin * 2 + line_h * (full_text.count('\n') + 3)
     img = Image.new('RGB', (width, max(canvas_h, 200)), color='white')
     draw = ImageDraw.Draw(img)
-    x = margin
-    y = margin
-    if title_font:
-        draw.text((x, y), 'DICOM METADATA REPORT', fill='black', font=title_font)
-    else:
-        draw.text((x, y), 'DICOM METADATA REPORT', fill='black')
-    y += line_h * 2
-    for line in lines:
-        if len(line) > 120:
-            for chunk in [line[i:i+120] for i in range(0, len(line), 120)]:
-                draw.text((x, y), chunk, fill='black', font=font)
-                y += line_h
-        else:
-            draw.text((x, y), line, fill='black', font=font)
-            y += line_h
-    if thumbnail_path and Path(thumbnail_path).exists():
+    draw.text((margin, margin), 'DICOM METADATA REPORT', fill='black', font=font)
+    # one multiline_text call instead of a draw.text per line
+    draw.multiline_text((margin, margin + line_h * 2), full_text, fill='black', font=font, spacing=_LINE_SPACING)
+    thumb = None
+    if thumb_img is not None:
+        # already decoded by the thumbnail step; copy since thumbnail() resizes in place
+        thumb = thumb_img.copy()
+    elif thumb_ok and thumbnail_path:
         try:
             thumb = Image.open(thumbnail_path)
+        except Exception:
+            thumb = None
+    if thumb is not None:
+        try:
             thumb.thumbnail((right_col_width, right_col_width))
             img.paste(thumb, (width - right_col_width - margin, margin))
         except Exception:
@@ -999,44 +1454,125 @@ def dicom_to_fhir_imagingstudy(sanitized: Dict[str, Any]) -> Dict[str, Any]:
 
 # ------------------ Streaming aggregation ------------------
 
+class AggregateCsvWriter:
+    """Incremental CSV writer: header is the key union of the first rows, one 1 MiB-buffered handle for the whole run."""
+
+    # rows buffered before the header is fixed; datasets of different modalities carry different keys
+    PRELOAD = 64
+
+    def __init__(self, outpath: Path, flush_every: int = 1000, fieldnames: Optional[List[str]] = None):
+        self.outpath = outpath
+        self.count = 0
+        self._flush_every = flush_every
+        self._fh = None
+        self._writer = None
+        self._fieldnames: List[str] = list(fieldnames) if fieldnames else []
+        self._getter = None
+        self._pending: List[Dict[str, Any]] = []
+        self._failed = False
+
+    def _open(self):
+        # opened lazily so an empty run leaves no file behind
+        if not self._fieldnames:
+            seen: Dict[str, None] = {}
+            for r in self._pending:
+                seen.update(dict.fromkeys(r))
+            self._fieldnames = list(seen)
+        try:
+            self._fh = open(self.outpath, 'w', newline='', encoding='utf-8', buffering=1 << 20)
+        except OSError:
+            # buffered rows can't be written anywhere; close() must not retry the open
+            self._failed = True
+            self._pending = []
+            raise
+        # itemgetter returns a bare value for a single key; keep it a tuple
+        self._getter = itemgetter(*self._fieldnames) if len(self._fieldnames) > 1 else (lambda r, ks=tuple(self._fieldnames): tuple(r[k] for k in ks))
+        self._writer = csv.writer(self._fh)
+        self._writer.writerow(self._fieldnames)
+        pending, self._pending = self._pending, []
+        for r in pending:
+            self._write_row(r)
+
+    def _write_row(self, row: Dict[str, Any]):
+        try:
+            # rows carrying every header key: one C-level fetch, plain list writerow (no DictWriter)
+            values = self._getter(row)
+        except KeyError:
+            values = [row[k] if k in row else '' for k in self._fieldnames]
+        self._writer.writerow([_flatten_for_csv_value(v) for v in values])
+        self.count += 1
+        if self.count % self._flush_every == 0:
+            self._fh.flush()
+
+    def write(self, row: Dict[str, Any]):
+        if self._writer is not None:
+            self._write_row(row)
+            return
+        self._pending.append(row)
+        if self._fieldnames or len(self._pending) >= self.PRELOAD:
+            self._open()
+
+    def close(self):
+        if self._failed:
+            return
+        if self._fh is None and self._pending:
+            self._open()
+        if self._fh is None:
+            logging.warning('No rows to write to %s', self.outpath)
+            return
+        fh, self._fh = self._fh, None
+        fh.close()
+        logging.info('Wrote %d rows to %s', self.count, self.outpath)
+
+
 def stream_write_csv(rows_iter: Iterable[Dict[str, Any]], outpath: Path):
     """Write rows (dicts) to CSV streaming to avoid memory issues."""
-    it = iter(rows_iter)
+    writer = AggregateCsvWriter(outpath)
     try:
-        first = next(it)
-    except StopIteration:
-        logging.warning('No rows to write to %s', outpath)
-        return
-    fieldnames = list(first.keys())
-    with open(outpath, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerow({k: _flatten_for_csv_value(v) for k, v in first.items()})
-        cnt = 1
-        for r in it:
-            writer.writerow({k: _flatten_for_csv_value(r.get(k)) for k in fieldnames})
-            cnt += 1
-            if cnt % 1000 == 0:
-                f.flush()
-    logging.info('Wrote %d rows to %s', cnt, outpath)
+        for r in rows_iter:
+            writer.write(r)
+    finally:
+        writer.close()
+
+
+class AggregateJsonWriter:
+    """Incremental JSON-array writer: one compact row per line, same lazy-open/flush policy as the CSV writer."""
+
+    def __init__(self, outpath: Path, flush_every: int = 1000):
+        self.outpath = outpath
+        self.count = 0
+        self._flush_every = flush_every
+        self._fh = None
+
+    def write(self, row: Dict[str, Any]):
+        if self._fh is None:
+            self._fh = open(self.outpath, 'wb', buffering=1 << 20)
+            self._fh.write(b'[\n')
+        else:
+            self._fh.write(b',\n')
+        self._fh.write(_json_bytes(row, indent=False))
+        self.count += 1
+        if self.count % self._flush_every == 0:
+            self._fh.flush()
+
+    def close(self):
+        if self._fh is None:
+            logging.warning('No rows to write to %s', self.outpath)
+            return
+        self._fh.write(b'\n]')
+        self._fh.close()
+        self._fh = None
+        logging.info('Wrote %d rows to %s', self.count, self.outpath)
 
 
 def stream_write_json(rows_iter: Iterable[Dict[str, Any]], outpath: Path):
     # write as a JSON array streaming
-    with open(outpath, 'w', encoding='utf-8') as f:
-        f.write('[\n')
-        first = True
-        cnt = 0
+    writer = AggregateJsonWriter(outpath)
+    try:
         for r in rows_iter:
-            if not first:
-                f.write(',\n')
-            f.write(json.dumps(r, ensure_ascii=False))
-            first = False
-            cnt += 1
-            if cnt % 1000 == 0:
-                f.flush()
-        f.write('\n]')
-    logging.info('Wrote %d rows to %s', cnt, outpath)
+            writer.write(r)
+    finally:
+        writer.close()
 
 # ------------------ Main ------------------
 
@@ -1050,6 +1586,14 @@ def main():
 
     configure_logging(args.quiet, args.verbose, args.log_file)
 
+    if args.jit:
+        _enable_jit()
+
+    # one salt per run so every file (and every worker process) maps values identically
+    if args.anonymize and args.anonymize_mode == 'pseudonymize' and args.anonymize_salt is None:
+        args.anonymize_salt = base64.urlsafe_b64encode(os.urandom(12)).decode('utf-8')
+        logging.warning('No anonymize-salt provided: generating a random salt for this run (saving it to map will allow reproducibility)')
+
     if args.check_deps:
         deps = check_dependencies()
         for k, v in deps.items():
@@ -1057,6 +1601,7 @@ def main():
         return
 
     outputs_map = parse_output_items(args.output or [], args.output_dir)
+    out_flags = output_flags(outputs_map)
 
     # Export schema quick path
     if args.export_schema:
@@ -1072,6 +1617,8 @@ def main():
             writer.writerow(header)
         return
 
+    prepare_output_dir(args, outputs_map)
+
     # Interactive REPL
     if args.path is None and not args.no_interactive:
         logging.info('Interactive mode. Enter DICOM path (or "exit").')
@@ -1090,7 +1637,7 @@ def main():
                 logging.error('Path not found: %s', user_in)
                 continue
             run_map = outputs_map if outputs_map else {}
-            process_and_save(user_in, args, run_map, dry_run=args.dry_run)
+            process_and_save(user_in, args, run_map, dry_run=args.dry_run, flags=out_flags)
         return
 
     # Non-interactive
@@ -1103,97 +1650,97 @@ def main():
             logging.warning('No .dcm files found under %s', args.path)
             return
         total = len(files)
-        logging.info('Processing %d files with %d threads', total, max(1, min(args.threads, MAX_THREADS)))
+        workers = max(1, min(args.threads, MAX_THREADS))
+        executor_kind = args.executor or ('process' if workers > 1 else 'thread')
+        if executor_kind == 'process' and sys.platform == 'win32':
+            # ProcessPoolExecutor rejects more than 61 workers on Windows
+            workers = min(workers, MAX_WIN_PROCESSES)
+        logging.info('Processing %d files with %d %s workers', total, workers, executor_kind)
 
         # suppression logic
         suppress_details = total >= max(args.min_progress_report, 1) and args.verbose == 0
 
-        results_iterable = []  # will be list of dicts; for streaming, we will yield as they complete
-        executor = ThreadPoolExecutor(max_workers=max(1, min(args.threads, MAX_THREADS)))
-        futures = {executor.submit(process_and_save, fpath, args, outputs_map, args.dry_run, suppress_details): fpath for fpath in files}
-
+        # one reference time for relative dates/ages across the whole run
+        batch_now = datetime.now()
+        if executor_kind == 'process':
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                           initargs=(args, outputs_map, suppress_details, batch_now, True, out_flags))
+        else:
+            _size_io_pool(workers)
+            executor = ThreadPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                          initargs=(args, outputs_map, suppress_details, batch_now, False, out_flags))
         use_tqdm = _TQDM and not args.quiet
         global_anon_map: Dict[str, str] = {}
         global_salt: Optional[str] = None
 
-        if use_tqdm:
-            for fut in tqdm(as_completed(futures), total=len(futures), desc='Processing'):
-                try:
-                    res = fut.result()
-                    if res:
-                        # collect mapping pieces
-                        amap = res.pop('_anon_map', None)
-                        if amap:
-                            global_anon_map.update(amap)
-                        salt = res.pop('_anon_salt', None)
-                        if salt and global_salt is None:
-                            global_salt = salt
-                        results_iterable.append(res)
-                except Exception as e:
-                    logging.error('Error in worker: %s', e)
-        else:
-            completed = 0
-            for fut in as_completed(futures):
+        # combined outputs are written row-by-row as results arrive; nothing is buffered per file
+        sinks: Dict[str, Any] = {}
+        for kind, label, fname, writer_cls in (('agg-csv', 'CSV', 'combined_metadata.csv', AggregateCsvWriter),
+                                               ('agg-json', 'JSON', 'combined_metadata.json', AggregateJsonWriter)):
+            if kind in outputs_map:
+                dest = Path(args.output_dir) / fname
+                if args.dry_run:
+                    logging.info('DRY RUN: would write combined %s -> %s', label, dest)
+                else:
+                    sinks[label] = writer_cls(dest)
+
+        # bounded submit window: at most 2x workers files in flight, so memory stays O(window) not O(N)
+        window = workers * 2
+        files_iter = iter(files)
+        inflight: Dict[Any, str] = {}
+        progress = tqdm(total=total, desc='Processing') if use_tqdm else None
+        completed = 0
+        while True:
+            while len(inflight) < window:
+                fpath = next(files_iter, None)
+                if fpath is None:
+                    break
+                inflight[executor.submit(_batch_worker, fpath)] = fpath
+            if not inflight:
+                break
+            done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                fpath = inflight.pop(fut)
                 try:
                     res = fut.result()
-                    if res:
-                        amap = res.pop('_anon_map', None)
-                        if amap:
-                            global_anon_map.update(amap)
-                        salt = res.pop('_anon_salt', None)
-                        if salt and global_salt is None:
-                            global_salt = salt
-                        results_iterable.append(res)
                 except Exception as e:
-                    logging.error('Error in worker: %s', e)
-                completed += 1
-                if completed % max(1, min(50, max(1, total//20))) == 0:
-                    logging.info('Progress: %d / %d', completed, total)
-
-        # Aggregation exports
-        if results_iterable and ('agg-csv' in outputs_map or 'agg-json' in outputs_map):
-            if _PANDAS_AVAILABLE:
-                df = pd.DataFrame(results_iterable)
-                if 'agg-csv' in outputs_map:
-                    combined_csv = Path(args.output_dir) / 'combined_metadata.csv'
-                    if args.dry_run:
-                        logging.info('DRY RUN: would write combined CSV -> %s', combined_csv)
-                    else:
-                        try:
-                            df.to_csv(combined_csv, index=False)
-                            logging.info('Combined CSV -> %s', combined_csv)
-                        except Exception as e:
-                            logging.error('Failed to write combined CSV: %s', e)
-                if 'agg-json' in outputs_map:
-                    combined_json = Path(args.output_dir) / 'combined_metadata.json'
-                    if args.dry_run:
-                        logging.info('DRY RUN: would write combined JSON -> %s', combined_json)
-                    else:
-                        try:
-                            df.to_json(combined_json, orient='records', force_ascii=False, indent=2)
-                            logging.info('Combined JSON -> %s', combined_json)
-                        except Exception as e:
-                            logging.error('Failed to write combined JSON: %s', e)
-            else:
-                # stream write
-                if 'agg-csv' in outputs_map:
-                    combined_csv = Path(args.output_dir) / 'combined_metadata.csv'
-                    if args.dry_run:
-                        logging.info('DRY RUN: would write combined CSV -> %s', combined_csv)
-                    else:
-                        try:
-                            stream_write_csv(iter(results_iterable), combined_csv)
-                        except Exception as e:
-                            logging.error('Failed to stream write combined CSV: %s', e)
-                if 'agg-json' in outputs_map:
-                    combined_json = Path(args.output_dir) / 'combined_metadata.json'
-                    if args.dry_run:
-                        logging.info('DRY RUN: would write combined JSON -> %s', combined_json)
-                    else:
+                    logging.error('Error in worker for %s: %s', fpath, e)
+                    res = None
+                if res:
+                    # collect mapping pieces
+                    amap = res.pop('_anon_map', None)
+                    if amap:
+                        global_anon_map.update(amap)
+                    salt = res.pop('_anon_salt', None)
+                    if salt and global_salt is None:
+                        global_salt = salt
+                    for label, sink in list(sinks.items()):
                         try:
-                            stream_write_json(iter(results_iterable), combined_json)
+                            sink.write(res)
                         except Exception as e:
-                            logging.error('Failed to stream write combined JSON: %s', e)
+                            logging.error('Failed to stream write combined %s: %s', label, e)
+                            del sinks[label]
+                            try:
+                                sink.close()
+                            except Exception as e:
+                                logging.error('Failed to close combined %s: %s', label, e)
+                completed += 1
+                if progress is not None:
+                    progress.update(1)
+                elif completed % max(1, min(50, max(1, total//20))) == 0:
+                    logging.info('Progress: %d / %d', completed, total)
+        if progress is not None:
+            progress.close()
+        executor.shutdown()
+        for label, sink in sinks.items():
+            # one bad sink must not stop the others or the anonymization map below
+            try:
+                sink.close()
+            except Exception as e:
+                logging.error('Failed to write combined %s: %s', label, e)
+                continue
+            if sink.count:
+                logging.info('Combined %s -> %s', label, sink.outpath)
 
         # save anonymization mapping if requested
         if global_anon_map and args.anonymize_map:
@@ -1206,8 +1753,7 @@ def main():
             else:
                 try:
                     map_path.parent.mkdir(parents=True, exist_ok=True)
-                    with open(map_path, 'w', encoding='utf-8') as f:
-                        json.dump(outobj, f, indent=2, ensure_ascii=False)
+                    _dump_json(outobj, map_path)
                     logging.info('Anonymization map -> %s', map_path)
                 except Exception as e:
                     logging.error('Failed to save anonymization map: %s', e)
@@ -1223,7 +1769,7 @@ def main():
         logging.error('Path does not exist: %s', args.path)
         sys.exit(1)
 
-    process_and_save(args.path, args, outputs_map, dry_run=args.dry_run)
+    process_and_save(args.path, args, outputs_map, dry_run=args.dry_run, flags=out_flags)
 
 
 if __name__ == '__main__':